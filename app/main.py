@@ -1,71 +1,423 @@
+import bisect
+import collections
+import errno
+import functools
 import os
-import readline
-import shlex
-import subprocess
+import re
+import select
+import signal
+import stat
 import sys
 
 executable_cache = set()
 full_path_executable_cache = {}
+sorted_executables = []
+executables_discovered = False
+directory_executables = {}
+current_working_directory = None
+interactive_input = False
+path_directories_cache = (None, ())
+completion_text = None
+completion_matches = []
+known_output_directories = set()
+pending_scan_warnings = []
+pending_input_lines = collections.deque()
+partial_input_line = b""
+input_at_eof = False
+
+HOME_DIRECTORY = os.environ.get("HOME", "/")
+SHLEX_METACHARACTERS = frozenset("\"'\\")
+PLAIN_WORD_PATTERN = re.compile(r"[^ \t\r\n]+")
+COMMAND_LINE_TOKEN_PATTERN = re.compile(
+    r"""(?P<space>[ \t\r\n]+)"""
+    r"""|(?P<plain>[^ \t\r\n'"\\]+)"""
+    r"""|'(?P<single>[^']*)'"""
+    r'|"(?P<double>(?:[^"\\]|\\.)*)"'
+    r"""|\\(?P<escaped>.)""",
+    re.DOTALL,
+)
+DOUBLE_QUOTE_ESCAPE_PATTERN = re.compile(r'\\([\\"])')
+REDIRECTION_OPERATORS = {
+    '>': ('stdout', 'w'),
+    '1>': ('stdout', 'w'),
+    '>>': ('stdout', 'a'),
+    '1>>': ('stdout', 'a'),
+    '2>': ('stderr', 'w'),
+    '2>>': ('stderr', 'a'),
+}
+REDIRECTION_FIRST_CHARACTERS = frozenset('>12')
+REDIRECTION_PATTERN = re.compile(r'(1?>>?|2>>?)(.*)', re.DOTALL)
+COPY_CHUNK_SIZE = 64 * 1024
+INPUT_CHUNK_SIZE = 64 * 1024
+ACCESS_SUPPORTS_DIR_FD = os.access in os.supports_dir_fd and os.scandir in os.supports_fd
+CHILD_DEFAULT_SIGNALS = tuple(getattr(signal, name) for name in ('SIGPIPE', 'SIGXFSZ') if hasattr(signal, name))
+SENDFILE_SUPPORTED = sys.platform.startswith("linux") and hasattr(os, "sendfile")
+SENDFILE_UNSUPPORTED_ERRORS = frozenset({errno.EINVAL, errno.ENOSYS, errno.ENOTSOCK, errno.EOPNOTSUPP})
+
 
 def discover_system_executables():
     """
     Scan all directories in the system PATH to discover and cache executable files.
 
-    This method builds two caches:
+    This method builds three caches:
     - executable_cache: A set of executable filenames
     - full_path_executable_cache: A dictionary mapping filenames to their full paths
+    - sorted_executables: The executable filenames in sorted order, for completion
+
+    Results are merged in PATH order, the first match for a name winning as in
+    command lookup. The scan only runs when tab completion needs the full list
+    of executables.
+    """
+    directories = get_path_directories()
+    scan_path_directories([directory for directory in directories if directory not in directory_executables])
+    rebuild_executable_caches(directories)
+
+
+def refresh_executables():
+    """
+    Rescan only the PATH directories that changed since they were last scanned.
+
+    Adding, removing, or renaming a file updates its directory's modification
+    time, so comparing one stat per PATH directory is enough to keep the
+    executable caches current without rescanning everything.
+    """
+    directories = get_path_directories()
+    changed = [directory for directory in directories
+               if directory not in directory_executables
+               or get_directory_mtime(directory) != directory_executables[directory][0]]
+    if changed:
+        scan_path_directories(changed)
+        search_path.cache_clear()
+        rebuild_executable_caches(directories)
+
+
+def scan_path_directories(directories):
+    """
+    Scan PATH directories and record their executables in directory_executables.
+
+    Directories are scanned concurrently, since each scan mostly waits on the
+    filesystem. concurrent.futures is imported here rather than at startup.
+    Warnings for unreadable directories are queued in pending_scan_warnings, since
+    the scan runs from the completer while the user's line is on screen.
+
+    Args:
+        directories (list): Directories to scan
+    """
+    import concurrent.futures
+
+    if not directories:
+        return
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(32, len(directories))) as executor:
+        for directory, mtime, (executables, warning) in executor.map(
+                lambda d: (d, get_directory_mtime(d), scan_path_directory(d)), directories):
+            if warning:
+                pending_scan_warnings.append(f"{warning}\n")
+            directory_executables[directory] = (mtime, executables)
+
+
+def report_scan_warnings():
+    """
+    Write out the warnings queued by PATH scans in a single write.
+
+    Called before each prompt, so warnings never land in the middle of a line
+    being edited.
+    """
+    if pending_scan_warnings:
+        write_to_stream(sys.stdout, "".join(pending_scan_warnings))
+        pending_scan_warnings.clear()
+
+
+def rebuild_executable_caches(directories):
+    """
+    Merge the recorded per-directory scan results into the executable caches.
+
+    Args:
+        directories (tuple): PATH directories in search order
+    """
+    global executables_discovered
+    executables_discovered = True
+    executable_cache.clear()
+    full_path_executable_cache.clear()
+    for directory in directories:
+        for name, full_path in directory_executables.get(directory, (None, ()))[1]:
+            executable_cache.add(name)
+            full_path_executable_cache.setdefault(name, full_path)
+    sorted_executables[:] = sorted(executable_cache)
+
+
+def get_directory_mtime(directory):
+    """
+    Return a directory's modification time, or None if it cannot be read.
+
+    Args:
+        directory (str): Directory to check
+
+    Returns:
+        int or None: Modification time in nanoseconds
+    """
+    try:
+        return os.stat(directory).st_mtime_ns
+    except OSError:
+        return None
+
+
+def scan_path_directory(directory):
+    """
+    List the executable files in a single PATH directory.
+
+    Directory entries come from os.scandir, so the file type check is served from
+    the directory listing and only os.access needs an extra syscall per entry.
+    Where supported, the directory is opened once and that descriptor serves
+    both the listing and the access checks, so the kernel does not walk the
+    full path again for every entry.
 
     Handles potential errors like:
-    - Non-existent directories
+    - Non-existent directories and non-directory PATH entries (skipped)
     - Permission-denied directories
+    - Other unreadable directories
+
+    Args:
+        directory (str): Directory to scan
+
+    Returns:
+        tuple: A list of (filename, full_path) pairs and a warning message or None
     """
-    for directory in os.environ["PATH"].split(os.pathsep):
-        if not os.path.isdir(directory):
-            continue
-        try:
-            for filename in os.listdir(directory):
-                full_path = os.path.join(directory, filename)
-                if is_executable(full_path):
-                    executable_cache.add(filename)
-                    full_path_executable_cache[filename] = full_path
-        except FileNotFoundError:
-            print(f"Warning: Directory not found - {directory}")
-        except PermissionError:
-            print(f"Warning: Permission denied - {directory}")
+    executables = []
+    directory_fd = None
+    try:
+        if ACCESS_SUPPORTS_DIR_FD:
+            directory_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        with os.scandir(directory if directory_fd is None else directory_fd) as entries:
+            for entry in entries:
+                access_path = entry.path if directory_fd is None else entry.name
+                try:
+                    if not entry.is_file(follow_symlinks=True):
+                        continue
+                    if os.access(access_path, os.X_OK, dir_fd=directory_fd):
+                        executables.append((entry.name, os.path.join(directory, entry.name)))
+                except OSError:
+                    # A single bad entry, such as a symlink loop, is skipped.
+                    continue
+    except (FileNotFoundError, NotADirectoryError):
+        pass
+    except PermissionError:
+        return executables, f"Warning: Permission denied - {directory}"
+    except OSError as e:
+        return executables, f"Warning: Cannot read directory - {directory}: {e.strerror}"
+    finally:
+        if directory_fd is not None:
+            os.close(directory_fd)
+    return executables, None
+
+
+def get_path_directories():
+    """
+    Return the directories listed in the system PATH.
+
+    Empty and repeated entries are dropped, keeping the first occurrence.
+    Absolute entries that resolve to the same directory, such as /bin and
+    /usr/bin on merged-/usr systems, count as repeats. The result is cached and
+    only recomputed when PATH itself changes, at which point every cached
+    command lookup is discarded as well.
+
+    Returns:
+        tuple: Unique PATH directories in search order
+    """
+    global path_directories_cache
+    env_path = os.environ.get("PATH", "")
+    if path_directories_cache[0] != env_path:
+        if path_directories_cache[0] is not None:
+            rehash_executables()
+        directories = {}
+        for directory in env_path.split(os.pathsep):
+            if directory:
+                key = os.path.realpath(directory) if os.path.isabs(directory) else directory
+                directories.setdefault(key, directory)
+        path_directories_cache = (env_path, tuple(directories.values()))
+    return path_directories_cache[1]
+
+
+def find_executable(name):
+    """
+    Resolve a command name to its full path using the executable cache.
+
+    Names missing from the cache are searched for on PATH and remembered, so
+    only commands that are actually used are ever looked up. The search is
+    memoized, so repeated typos do not walk PATH again either. Both are
+    forgotten when PATH changes.
+
+    Args:
+        name (str): Command name to look up
+
+    Returns:
+        str or None: Full path to the executable, or None if it is not on PATH
+    """
+    get_path_directories()
+    full_path = full_path_executable_cache.get(name)
+    if full_path or os.sep in name:
+        return full_path
+
+    full_path = search_path(name)
+    if full_path:
+        executable_cache.add(name)
+        full_path_executable_cache[name] = full_path
+        bisect.insort(sorted_executables, name)
+    return full_path
+
+
+@functools.lru_cache(maxsize=1024)
+def search_path(name):
+    """
+    Walk the system PATH looking for an executable with the given name.
+
+    Results, including misses, are memoized until the next rehash or PATH change.
+
+    Args:
+        name (str): Command name to look for
+
+    Returns:
+        str or None: Full path of the first match in PATH order, or None
+    """
+    join, executable = os.path.join, is_executable
+    for directory in get_path_directories():
+        full_path = join(directory, name)
+        if executable(full_path):
+            return full_path
+    return None
+
+
+def rehash_executables():
+    """
+    Discard cached PATH lookups so the next lookup or completion rescans PATH.
+
+    Needed when executables are installed or removed after the shell has started.
+    """
+    global executables_discovered
+    executables_discovered = False
+    executable_cache.clear()
+    full_path_executable_cache.clear()
+    sorted_executables.clear()
+    directory_executables.clear()
+    search_path.cache_clear()
+
+
+def forget_executable(name):
+    """
+    Drop one command from the executable caches after its remembered path went stale.
+
+    The next lookup searches PATH again, like bash does for a hashed command
+    that has disappeared.
+
+    Args:
+        name (str): Command name to forget
+    """
+    full_path_executable_cache.pop(name, None)
+    executable_cache.discard(name)
+    index = bisect.bisect_left(sorted_executables, name)
+    if index < len(sorted_executables) and sorted_executables[index] == name:
+        del sorted_executables[index]
+    search_path.cache_clear()
 
 
 def is_executable(path):
     """
     Verify if a given file path represents an executable file.
 
+    os.access makes the final call, so ACLs, noexec mounts and capabilities
+    are all taken into account.
+
     Args:
         path (str): Full path to the file to be checked
 
     Returns:
         bool: True if the file is executable, False otherwise
     """
-    return os.path.isfile(path) and os.access(path, os.X_OK)
+    try:
+        st = os.stat(path)
+    except (OSError, ValueError):
+        return False
+    return stat.S_ISREG(st.st_mode) and os.access(path, os.X_OK)
 
 
-def execute_subprocess(command, args):
+def execute_subprocess(command, args, executable=None, stdout_target=None, stderr_target=None):
     """
     Execute an external command as a subprocess with given arguments.
 
+    Streams without a target are inherited from the shell, so the child writes
+    straight to the terminal and its output never passes through Python. Nothing
+    is captured, so the child is started with os.posix_spawn directly, and the
+    redirection targets are installed as dup2 file actions. This skips
+    subprocess.Popen's pipe and error-reporting setup done for every command.
+
     Args:
         command (str): The command to execute
         args (list): Command-line arguments for the command
+        executable (str, optional): Resolved path of the command, skips the PATH search
+        stdout_target (int, optional): File descriptor the child writes its stdout to
+        stderr_target (int, optional): File descriptor the child writes its stderr to
 
     Returns:
-        tuple: A pair of strings containing subprocess stdout and stderr
+        int: Exit status of the command
+    """
+    file_actions = []
+    if stdout_target is not None:
+        file_actions.append((os.POSIX_SPAWN_DUP2, stdout_target, 1))
+    if stderr_target is not None:
+        file_actions.append((os.POSIX_SPAWN_DUP2, stderr_target, 2))
+
+    sys.stdout.flush()
+    sys.stderr.flush()
+    spawn = os.posix_spawn if executable else os.posix_spawnp
+    pid = spawn(executable or command, [command] + args, os.environ,
+                file_actions=file_actions, setsigdef=CHILD_DEFAULT_SIGNALS)
+    try:
+        _, status = os.waitpid(pid, 0)
+    except KeyboardInterrupt:
+        # The child got the same SIGINT; reap it before returning to the prompt.
+        os.waitpid(pid, 0)
+        raise
+    return os.waitstatus_to_exitcode(status)
 
-    Raises:
-        subprocess.CalledProcessError: If the subprocess execution fails
+
+def run_external_command(command, args, executable, stdout_file, stderr_file, modes):
+    """
+    Execute an external command with its redirection targets handed to the child.
+
+    The child writes into the target files itself, so redirected output is never
+    decoded, buffered, and re-encoded by the shell. If a target cannot be opened
+    the command is not run, as in other shells. If the remembered path no longer
+    exists, the command is forgotten so the next run searches PATH again.
+
+    Args:
+        command (str): The command to execute
+        args (list): Command-line arguments for the command
+        executable (str): Resolved path of the command
+        stdout_file (str or None): Redirection target for stdout
+        stderr_file (str or None): Redirection target for stderr
+        modes (dict): File open modes for 'stdout' and 'stderr'
+
+    Returns:
+        str: Error message if the command could not be started, otherwise empty
     """
+    targets = {}
     try:
-        result = subprocess.run([command] + args, capture_output=True, text=True, check=True)
-        return result.stdout, result.stderr
-    except subprocess.CalledProcessError as e:
-        return e.stdout, e.stderr
+        for stream, filename in (('stdout', stdout_file), ('stderr', stderr_file)):
+            if filename:
+                targets[stream] = open_output_file(filename, modes[stream])
+                if targets[stream] is None:
+                    return ""
+        execute_subprocess(command, args, executable, targets.get('stdout'), targets.get('stderr'))
+        return ""
+    except OSError as e:
+        if e.errno == errno.ENOENT:
+            forget_executable(command)
+        return f"{command}: {e.strerror}\n"
+    except ValueError as e:
+        return f"{command}: {e}\n"
+    finally:
+        for target in targets.values():
+            if target is not None:
+                os.close(target)
 
 
 def handle_echo_command(args):
@@ -81,7 +433,7 @@ def handle_echo_command(args):
     return " ".join(args) + "\n", ""
 
 
-def handle_type_command(args, commands):
+def handle_type_command(args, builtins):
     """
     Implement the 'type' shell command to identify command origins.
 
@@ -92,7 +444,7 @@ def handle_type_command(args, commands):
 
     Args:
         args (list): Command name to query
-        commands (dict): Dictionary of shell builtin commands
+        builtins (frozenset): Names that type reports as shell builtins
 
     Returns:
         tuple: A pair of strings (output, error_message)
@@ -100,15 +452,161 @@ def handle_type_command(args, commands):
     if not args:
         return "", "type: missing argument\n"
     command_name = args[0]
-    full_command = full_path_executable_cache.get(command_name)
-    if command_name in commands and command_name != "cat":
+    if command_name in builtins:
         return f"{command_name} is a shell builtin\n", ""
-    elif full_command:
+    full_command = find_executable(command_name)
+    if full_command:
         return f"{command_name} is {full_command}\n", ""
     else:
         return "", f"{command_name}: not found\n"
 
 
+def handle_rehash_command(args):
+    """
+    Implement the 'rehash' shell command to refresh the executable cache.
+
+    Args:
+        args (list): Ignored
+
+    Returns:
+        tuple: A pair of strings (output, error_message)
+    """
+    rehash_executables()
+    return "", ""
+
+
+def handle_hash_command(args):
+    """
+    Implement the 'hash' shell command to manage remembered command locations.
+
+    Supports:
+    - '-r' to forget all remembered locations and rescan PATH
+    - Command names to look up and remember
+
+    Args:
+        args (list): Options and command names
+
+    Returns:
+        tuple: A pair of strings (output, error_message)
+    """
+    stderr = ""
+    for arg in args:
+        if arg == "-r":
+            rehash_executables()
+        elif not find_executable(arg):
+            stderr += f"hash: {arg}: not found\n"
+    return "", stderr
+
+
+def handle_exec_command(args, stdout_file=None, stderr_file=None, modes=None):
+    """
+    Implement the 'exec' shell command to run a command in place of the shell.
+
+    The shell process image is replaced with os.execv, so unlike other external
+    commands no child process is forked and waited for. Names containing a
+    path separator are executed as given rather than looked up on PATH. Without
+    a command, the redirections are applied to the shell's own stdout/stderr
+    for the rest of the session.
+
+    Args:
+        args (list): Command to run followed by its arguments
+        stdout_file (str, optional): Redirection target for stdout
+        stderr_file (str, optional): Redirection target for stderr
+        modes (dict, optional): File open modes for 'stdout' and 'stderr'
+
+    Returns:
+        tuple: A pair of strings (output, error_message), only if the exec did not happen
+    """
+    if not args:
+        targets = open_redirection_targets(stdout_file, stderr_file, modes)
+        if targets:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            for fd, stream_fd in targets:
+                os.dup2(fd, stream_fd)
+                os.close(fd)
+        return "", ""
+    full_path = args[0] if os.sep in args[0] else find_executable(args[0])
+    if not full_path:
+        return "", f"exec: {args[0]}: not found\n"
+    error = replace_shell_process(full_path, args, stdout_file, stderr_file, modes)
+    return "", f"exec: {args[0]}: {error}\n" if error else ""
+
+
+def replace_shell_process(full_path, argv, stdout_file=None, stderr_file=None, modes=None):
+    """
+    Replace the shell process with a command using os.execv.
+
+    Every redirection target is opened before anything is changed. The targets
+    are then installed onto stdout/stderr with dup2, and SIGPIPE and SIGXFSZ are
+    reset to their defaults, as for spawned commands. If the exec fails, the
+    shell's own stdout/stderr and signal handlers are put back.
+
+    Args:
+        full_path (str): Path of the program to execute
+        argv (list): Argument vector, starting with the command name
+        stdout_file (str, optional): Redirection target for stdout
+        stderr_file (str, optional): Redirection target for stderr
+        modes (dict, optional): File open modes for 'stdout' and 'stderr'
+
+    Returns:
+        str: Why the exec failed, or an empty string if a redirection target
+        could not be opened (that error has already been reported)
+    """
+    targets = open_redirection_targets(stdout_file, stderr_file, modes)
+    if targets is None:
+        return ""
+    try:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        saved_fds, saved_signals = [], []
+        try:
+            for fd, stream_fd in targets:
+                saved_fds.append((os.dup(stream_fd), stream_fd))
+                os.dup2(fd, stream_fd)
+            for signum in CHILD_DEFAULT_SIGNALS:
+                saved_signals.append((signum, signal.signal(signum, signal.SIG_DFL)))
+            os.execv(full_path, argv)
+        except OSError as e:
+            return e.strerror
+        except ValueError as e:
+            return str(e)
+        finally:
+            for signum, handler in saved_signals:
+                signal.signal(signum, handler)
+            for saved_fd, stream_fd in saved_fds:
+                os.dup2(saved_fd, stream_fd)
+                os.close(saved_fd)
+    finally:
+        for fd, _ in targets:
+            os.close(fd)
+
+
+def open_redirection_targets(stdout_file, stderr_file, modes):
+    """
+    Open every redirection target before any of them is installed.
+
+    Args:
+        stdout_file (str or None): Redirection target for stdout
+        stderr_file (str or None): Redirection target for stderr
+        modes (dict): File open modes for 'stdout' and 'stderr'
+
+    Returns:
+        list or None: (file_descriptor, stream_fd) pairs, or None if a target
+        could not be opened (already reported; nothing is left open)
+    """
+    targets = []
+    for stream, filename, stream_fd in (('stdout', stdout_file, 1), ('stderr', stderr_file, 2)):
+        if filename:
+            fd = open_output_file(filename, modes[stream])
+            if fd is None:
+                for opened_fd, _ in targets:
+                    os.close(opened_fd)
+                return None
+            targets.append((fd, stream_fd))
+    return targets
+
+
 def handle_change_directory(args):
     """
     Change the current working directory based on provided arguments.
@@ -124,9 +622,12 @@ def handle_change_directory(args):
     Returns:
         tuple: A pair of strings (output, error_message)
     """
-    target_dir = os.environ.get("HOME", "/") if not args or args[0] == "~" else args[0]
+    global current_working_directory
+    target_dir = HOME_DIRECTORY if not args or args[0] == "~" else args[0]
     try:
         os.chdir(target_dir)
+        current_working_directory = get_working_directory()
+        known_output_directories.clear()
         return "", ""
     except FileNotFoundError:
         return "", f"cd: {target_dir}: No such file or directory\n"
@@ -134,28 +635,219 @@ def handle_change_directory(args):
         return "", f"cd: {target_dir}: Permission denied\n"
 
 
-def handle_cat_command(args):
+def handle_pwd_command(args):
+    """
+    Implement the 'pwd' command using the cached working directory.
+
+    If the directory could not be determined when it was cached (for example
+    because it has been deleted), it is looked up again so the error is reported.
+
+    Args:
+        args (list): Ignored
+
+    Returns:
+        tuple: A pair of strings (working_directory, error_message)
+    """
+    global current_working_directory
+    if current_working_directory is None:
+        try:
+            current_working_directory = os.getcwd()
+        except OSError as e:
+            return "", f"pwd: error retrieving current directory: {e.strerror}\n"
+    return current_working_directory + "\n", ""
+
+
+def get_working_directory():
+    """
+    Return the current working directory, or None if it cannot be determined.
+
+    Returns:
+        str or None: Absolute path of the working directory
+    """
+    try:
+        return os.getcwd()
+    except OSError:
+        return None
+
+
+def handle_cat_command(args, destination=None):
     """
     Implement the 'cat' command to read and display file contents.
 
     Supports multiple file arguments and handles various file access errors.
+    When a destination is given, file contents are copied into it as bytes
+    on raw file descriptors instead of being collected into a string.
 
     Args:
         args (list): Paths of files to concatenate and display
+        destination (int, optional): File descriptor to copy contents into
 
     Returns:
         tuple: A pair of strings (concatenated_file_contents, error_messages)
     """
-    stdout, stderr = "", ""
+    contents, errors = [], []
     for path in args:
         try:
-            with open(path, 'r') as f:
-                stdout += f.read()
+            if destination is None:
+                with open(path, 'r') as f:
+                    contents.append(f.read())
+            else:
+                source = os.open(path, os.O_RDONLY)
+                try:
+                    source_stat, destination_stat = os.fstat(source), os.fstat(destination)
+                    if (stat.S_ISREG(source_stat.st_mode) and source_stat.st_dev == destination_stat.st_dev
+                            and source_stat.st_ino == destination_stat.st_ino):
+                        errors.append(f"cat: {path}: input file is output file\n")
+                        continue
+                    # Regular files are copied up to their size at open time, so output
+                    # appended to the source while copying is not read back.
+                    size = source_stat.st_size if stat.S_ISREG(source_stat.st_mode) and source_stat.st_size else None
+                    copy_file_contents(source, destination, size)
+                finally:
+                    os.close(source)
         except FileNotFoundError:
-            stderr += f"cat: {path}: No such file or directory\n"
+            errors.append(f"cat: {path}: No such file or directory\n")
         except PermissionError:
-            stderr += f"cat: {path}: Permission denied\n"
-    return stdout, stderr
+            errors.append(f"cat: {path}: Permission denied\n")
+        except IsADirectoryError:
+            errors.append(f"cat: {path}: Is a directory\n")
+        except OSError as e:
+            # Includes errors writing to the destination, such as ENOSPC or EPIPE.
+            errors.append(f"cat: {path}: {e.strerror}\n")
+    return "".join(contents), "".join(errors)
+
+
+def stream_cat_command(args, stdout_file, mode):
+    """
+    Run 'cat' without materializing file contents in Python strings.
+
+    Output goes to the redirection target when one is given, otherwise straight
+    to the stdout file descriptor.
+
+    Args:
+        args (list): Paths of files to concatenate
+        stdout_file (str or None): Redirection target for stdout
+        mode (str): File open mode for the target ('w' or 'a')
+
+    Returns:
+        str: Error messages produced while reading the files
+    """
+    if not stdout_file:
+        sys.stdout.flush()
+        return handle_cat_command(args, sys.stdout.fileno())[1]
+
+    fd = open_output_file(stdout_file, mode)
+    if fd is None:
+        return ""
+    try:
+        return handle_cat_command(args, fd)[1]
+    finally:
+        os.close(fd)
+
+
+def copy_file_contents(source, destination, size=None):
+    """
+    Copy the rest of one file descriptor, or at most size bytes of it, into another.
+
+    On Linux the copy is done with os.sendfile, which moves the data inside the
+    kernel. Only Linux accepts sendfile between arbitrary descriptors without an
+    explicit offset, so other platforms go straight to an os.read/os.write loop.
+    Destinations Linux's sendfile cannot write to (appended files) fall back to
+    the same loop, carrying on from wherever sendfile stopped.
+
+    Args:
+        source (int): File descriptor to read from
+        destination (int): File descriptor to write to
+        size (int, optional): Maximum number of bytes to copy; unlimited if None
+    """
+    remaining = size
+    if SENDFILE_SUPPORTED:
+        try:
+            while remaining is None or remaining > 0:
+                count = COPY_CHUNK_SIZE if remaining is None else min(COPY_CHUNK_SIZE, remaining)
+                sent = os.sendfile(destination, source, None, count)
+                if not sent:
+                    return
+                if remaining is not None:
+                    remaining -= sent
+            return
+        except OSError as e:
+            if e.errno not in SENDFILE_UNSUPPORTED_ERRORS:
+                raise
+    while remaining is None or remaining > 0:
+        count = COPY_CHUNK_SIZE if remaining is None else min(COPY_CHUNK_SIZE, remaining)
+        data = memoryview(os.read(source, count))
+        if not data:
+            return
+        if remaining is not None:
+            remaining -= len(data)
+        while data:
+            data = data[os.write(destination, data):]
+
+
+def split_command_line(line):
+    """
+    Split a command line into arguments using shell quoting rules.
+
+    Lines without quotes or backslashes are split on runs of the characters shlex
+    treats as whitespace (space, tab, CR, LF) with one precompiled pattern.
+    str.split is not used because it also splits on characters such as
+    vertical tab, form feed and no-break space. Everything else goes through
+    tokenize_command_line.
+
+    Args:
+        line (str): Raw command line
+
+    Returns:
+        list: Command name followed by its arguments
+    """
+    if SHLEX_METACHARACTERS.isdisjoint(line):
+        return PLAIN_WORD_PATTERN.findall(line)
+    return tokenize_command_line(line)
+
+
+def tokenize_command_line(line):
+    """
+    Split a command line the way shlex.split does in POSIX mode.
+
+    The line is consumed with one precompiled pattern, a quoted section or run
+    of plain characters at a time, instead of shlex's character-by-character
+    state machine.
+
+    Args:
+        line (str): Raw command line
+
+    Returns:
+        list: Command name followed by its arguments
+
+    Raises:
+        ValueError: If a quote is left open or the line ends in a backslash
+    """
+    words, word, position = [], None, 0
+    while position < len(line):
+        match = COMMAND_LINE_TOKEN_PATTERN.match(line, position)
+        if match is None:
+            # Unbalanced input; shlex raises the matching ValueError.
+            import shlex
+            return shlex.split(line)
+        position = match.end()
+        kind = match.lastgroup
+        if kind == "space":
+            if word is not None:
+                words.append("".join(word))
+                word = None
+            continue
+        if word is None:
+            word = []
+        if kind == "double":
+            word.append(DOUBLE_QUOTE_ESCAPE_PATTERN.sub(r"\1", match.group(kind)))
+        elif kind == "plain":
+            word.append(match.group())
+        else:
+            word.append(match.group(kind))
+    if word is not None:
+        words.append("".join(word))
+    return words
 
 
 def parse_command_redirection(cmd_args):
@@ -167,78 +859,128 @@ def parse_command_redirection(cmd_args):
     - Stderr: '2>', '2>>'
     - Compact forms like '>file', '2>file'
 
+    Argument lists without any '>' are returned as they are, without scanning.
+
     Args:
         cmd_args (list): Full list of command arguments
 
     Returns:
         tuple: Processed arguments, stdout file, stderr file, and redirection modes
     """
-    stdout_file, stderr_file = None, None
+    modes = {'stdout': 'w', 'stderr': 'w'}
+    if not any('>' in arg for arg in cmd_args):
+        return cmd_args, None, None, modes
+
+    files = {'stdout': None, 'stderr': None}
     remaining_args = []
-    stdout_mode, stderr_mode = 'w', 'w'
     i = 0
 
     while i < len(cmd_args):
         arg = cmd_args[i]
-
-        if arg in ('>>', '1>>'):
-            stdout_file, stdout_mode = cmd_args[i + 1], 'a'
-            i += 2
-        elif arg in ('>', '1>'):
-            stdout_file, stdout_mode = cmd_args[i + 1], 'w'
-            i += 2
-        elif arg == '2>>':
-            stderr_file, stderr_mode = cmd_args[i + 1], 'a'
-            i += 2
-        elif arg == '2>':
-            stderr_file, stderr_mode = cmd_args[i + 1], 'w'
-            i += 2
-        elif arg.startswith('2>>') and len(arg) > 3:
-            stderr_file, stderr_mode = arg[3:], 'a'
-            i += 1
-        elif arg.startswith('2>') and len(arg) > 2:
-            stderr_file, stderr_mode = arg[2:], 'w'
-            i += 1
-        elif arg.startswith('1>>') and len(arg) > 3:
-            stdout_file, stdout_mode = arg[3:], 'a'
-            i += 1
-        elif arg.startswith('1>') and len(arg) > 2:
-            stdout_file, stdout_mode = arg[2:], 'w'
+        if arg[:1] not in REDIRECTION_FIRST_CHARACTERS:
+            remaining_args.append(arg)
             i += 1
-        elif arg.startswith('>>') and len(arg) > 2:
-            stdout_file, stdout_mode = arg[2:], 'a'
+            continue
+
+        redirection = REDIRECTION_PATTERN.fullmatch(arg)
+        if not redirection or not redirection.group(2) and i + 1 == len(cmd_args):
+            # Not an operator, or an operator with no target left to take.
+            remaining_args.append(arg)
             i += 1
-        elif arg.startswith('>') and len(arg) > 1:
-            stdout_file, stdout_mode = arg[1:], 'w'
+            continue
+
+        stream, mode = REDIRECTION_OPERATORS[redirection.group(1)]
+        target = redirection.group(2)
+        if target:
             i += 1
         else:
-            remaining_args.append(arg)
-            i += 1
+            target = cmd_args[i + 1]
+            i += 2
+        files[stream], modes[stream] = target, mode
 
-    return remaining_args, stdout_file, stderr_file, {'stdout': stdout_mode, 'stderr': stderr_mode}
+    return remaining_args, files['stdout'], files['stderr'], modes
 
 
-def write_output_to_file(filename, content, mode):
+def open_output_file(filename, mode):
     """
-    Write content to a file with specified mode, creating directories if needed.
+    Open a redirection target with specified mode, creating directories if needed.
+
+    Directories that are known to exist are remembered in known_output_directories,
+    so repeated redirects into the same directory skip the directory check. If a
+    remembered directory has been removed since, it is forgotten and created
+    again. The file is opened with os.open, without any Python-level buffering layer.
 
     Args:
         filename (str): Path to the output file
-        content (str): Content to write
         mode (str): File open mode ('w' for write, 'a' for append)
 
+    Returns:
+        int or None: File descriptor of the opened file, or None if it could not be opened
+
     Handles file and directory creation errors gracefully.
     """
+    flags = os.O_WRONLY | os.O_CREAT | (os.O_APPEND if mode == 'a' else os.O_TRUNC)
     try:
         directory = os.path.dirname(filename)
-        if directory and not os.path.exists(directory):
+        if directory and directory not in known_output_directories:
+            os.makedirs(directory, exist_ok=True)
+            known_output_directories.add(directory)
+        try:
+            return os.open(filename, flags, 0o666)
+        except FileNotFoundError:
+            if directory not in known_output_directories:
+                raise
+            known_output_directories.discard(directory)
             os.makedirs(directory, exist_ok=True)
-        with open(filename, mode) as f:
-            f.write(content)
+            known_output_directories.add(directory)
+            return os.open(filename, flags, 0o666)
     except FileNotFoundError:
         print(f"Error: {filename}: No such file or directory", file=sys.stderr)
     except PermissionError:
         print(f"Error: {filename}: Permission denied", file=sys.stderr)
+    except OSError as e:
+        print(f"Error: {filename}: {e.strerror}", file=sys.stderr)
+    return None
+
+
+def write_output_to_file(filename, content, mode):
+    """
+    Write content to a file with specified mode, creating directories if needed.
+
+    Args:
+        filename (str): Path to the output file
+        content (str): Content to write
+        mode (str): File open mode ('w' for write, 'a' for append)
+
+    Handles file and directory creation errors gracefully.
+    """
+    fd = open_output_file(filename, mode)
+    if fd is None:
+        return
+    try:
+        data = memoryview(content.encode())
+        while data:
+            data = data[os.write(fd, data):]
+    except OSError as e:
+        print(f"Error: {filename}: {e.strerror}", file=sys.stderr)
+    finally:
+        os.close(fd)
+
+
+def write_to_stream(stream, content):
+    """
+    Write content to a standard stream through its binary buffer.
+
+    The content is encoded once and handed to the buffer in a single write,
+    bypassing the text layer's incremental encoding.
+
+    Args:
+        stream (file): sys.stdout or sys.stderr
+        content (str): Content to write
+    """
+    stream.flush()
+    stream.buffer.write(content.encode(stream.encoding, stream.errors))
+    stream.buffer.flush()
 
 
 def command_name_completer(text, state):
@@ -246,7 +988,9 @@ def command_name_completer(text, state):
     Readline completer for shell command names.
 
     Provides tab-completion for built-in commands and system executables.
-    Handles single/multiple matches and provides user feedback.
+    Handles single/multiple matches and provides user feedback. Matches are
+    computed once per completion attempt (state 0) and reused for later states
+    of the same text, so listing N candidates costs one lookup rather than N.
 
     Args:
         text (str): Current text being completed
@@ -255,28 +999,146 @@ def command_name_completer(text, state):
     Returns:
         str or None: Completed command or None if no match
     """
-    builtins = ["exit ", "echo ", "type ", "pwd ", "cd ", "cat "]
+    global completion_text, completion_matches
+    if state == 0 or text != completion_text:
+        if executables_discovered:
+            refresh_executables()
+        else:
+            discover_system_executables()
+        completion_text = text
+        completion_matches = find_completion_matches(text)
+        if not completion_matches and state == 0:
+            sys.stdout.write('\a')
+            sys.stdout.flush()
+
+    if state < len(completion_matches):
+        return completion_matches[state]
+    return None
 
-    matches_builtins = [cmd for cmd in builtins if cmd.startswith(text)]
-    matches_executables = [cmd for cmd in executable_cache if cmd.startswith(text)]
 
-    if not matches_builtins and not matches_executables and state == 0:
-        sys.stdout.write('\a')
-        sys.stdout.flush()
-        return None
+def find_completion_matches(text):
+    """
+    Collect completion candidates for a command name prefix.
+
+    Builtins take precedence over executables. Both are kept sorted, so the
+    candidates sharing the prefix are found with binary searches.
+
+    Args:
+        text (str): Current text being completed
 
+    Returns:
+        list: Candidate completions, with a trailing space for unique executables
+    """
+    matches_builtins = find_prefix_range(builtin_completions, text)
     if matches_builtins:
-        return matches_builtins[state]
-    elif matches_executables:
-        if len(matches_executables) == 1:
-            return matches_executables[state] + " "
-        else:
-            return matches_executables[state]
-    return None
+        return list(matches_builtins)
+
+    matches_executables = find_prefix_range(sorted_executables, text)
+    if len(matches_executables) == 1:
+        return [matches_executables[0] + " "]
+    return matches_executables
+
+
+def find_prefix_range(sorted_names, prefix):
+    """
+    Return the names starting with a prefix from a sorted sequence.
+
+    Names sharing a prefix form a contiguous range, located with two binary searches.
+
+    Args:
+        sorted_names (list or tuple): Names in sorted order
+        prefix (str): Prefix to look for
+
+    Returns:
+        list or tuple: Slice of sorted_names with the matching names
+    """
+    start = bisect.bisect_left(sorted_names, prefix)
+    end = bisect.bisect_left(sorted_names, prefix + '\U0010ffff', start)
+    return sorted_names[start:end]
+
+
+def read_command_line(prompt):
+    """
+    Read one command line, like input().
+
+    Terminals keep going through input() so readline provides line editing and
+    tab completion. Other input (piped or pasted scripts) is read in large chunks
+    with os.read and split into lines, so a batch of lines costs one read.
+    Whether stdin is a terminal is checked once, at startup.
 
+    Args:
+        prompt (str): Prompt written before the line is read
+
+    Returns:
+        str: The line, without its trailing newline
+
+    Raises:
+        EOFError: If the input is exhausted
+    """
+    if interactive_input:
+        return input(prompt)
+
+    sys.stdout.write(prompt)
+    sys.stdout.flush()
+    while not pending_input_lines and not input_at_eof:
+        buffer_input_chunk(os.read(sys.stdin.fileno(), INPUT_CHUNK_SIZE))
+    if not pending_input_lines:
+        raise EOFError
+    return pending_input_lines.popleft().decode(sys.stdin.encoding or "utf-8", "replace")
 
-readline.parse_and_bind("tab: complete")
-readline.set_completer(command_name_completer)
+
+def buffer_input_chunk(chunk):
+    """
+    Split a chunk of scripted input into complete lines queued for reading.
+
+    Args:
+        chunk (bytes): Data read from stdin, empty at end of input
+    """
+    global partial_input_line, input_at_eof
+    if not chunk:
+        input_at_eof = True
+        if partial_input_line:
+            pending_input_lines.append(partial_input_line)
+            partial_input_line = b""
+        return
+    lines = (partial_input_line + chunk).split(b"\n")
+    partial_input_line = lines.pop()
+    pending_input_lines.extend(lines)
+
+
+def input_exhausted():
+    """
+    Tell whether scripted input is known to have no lines left, without blocking.
+
+    stdin is only read ahead when select reports it readable, so a script fed
+    from a slow pipe is never held up waiting for its next line.
+
+    Returns:
+        bool: True if the current line is the last one of non-interactive input
+    """
+    if interactive_input or pending_input_lines or partial_input_line:
+        return False
+    if not input_at_eof and select.select([sys.stdin.fileno()], [], [], 0)[0]:
+        buffer_input_chunk(os.read(sys.stdin.fileno(), INPUT_CHUNK_SIZE))
+    return input_at_eof and not pending_input_lines
+
+
+commands = {
+    "exit": lambda arguments: sys.exit(0),
+    "echo": handle_echo_command,
+    "type": lambda arguments: handle_type_command(arguments, reported_builtins),
+    "pwd": handle_pwd_command,
+    "cd": handle_change_directory,
+    "cat": handle_cat_command,
+    "rehash": handle_rehash_command,
+    "hash": handle_hash_command,
+    "exec": handle_exec_command,
+}
+# cat is reported by type as the external program it stands in for.
+reported_builtins = frozenset(commands) - {"cat"}
+# Only the everyday builtins are completed: builtin matches take precedence, and
+# rehash, hash and exec would otherwise hide executables such as readlink or head.
+builtin_completions = tuple(sorted(f"{name} " for name in ("exit", "echo", "type", "pwd", "cd", "cat")))
 
 
 def main():
@@ -284,53 +1146,71 @@ def main():
     Main shell execution loop.
 
     Features:
-    - Shell built-in commands: exit, echo, type, pwd, cd, cat
+    - Shell built-in commands: exit, echo, type, pwd, cd, cat, rehash, hash, exec
     - System executable support
     - Output and error redirection
     - Tab completion
     - Error handling for various scenarios
     """
-    discover_system_executables()
+    global current_working_directory, interactive_input
+    current_working_directory = get_working_directory()
+    interactive_input = sys.stdin.isatty()
+    if interactive_input:
+        # Line editing is only needed at a terminal; scripted input never loads readline.
+        import readline
 
-    commands = {
-        "exit": lambda arguments: sys.exit(0),
-        "echo": handle_echo_command,
-        "type": lambda arguments: handle_type_command(arguments, commands),
-        "pwd": lambda arguments: (os.getcwd() + "\n", ""),
-        "cd": handle_change_directory,
-        "cat": handle_cat_command,
-    }
+        readline.parse_and_bind("tab: complete")
+        readline.set_completer(command_name_completer)
 
     while True:
         try:
-            user_input = input("$ ").strip()
+            report_scan_warnings()
+            user_input = read_command_line("$ ").strip()
             if not user_input:
                 continue
 
-            args = shlex.split(user_input)
+            args = split_command_line(user_input)
             if not args:
                 continue
 
             cmd, *cmd_args = args
             filtered_args, stdout_file, stderr_file, modes = parse_command_redirection(cmd_args)
 
-            if cmd in commands:
-                stdout, stderr = commands[cmd](filtered_args)
-            else:
-                if cmd in executable_cache:
-                    stdout, stderr = execute_subprocess(cmd, filtered_args)
+            handler = commands.get(cmd)
+            if handler is None:
+                full_path = find_executable(cmd)
+                if full_path and input_exhausted():
+                    # Last line of a script: run it in place of the shell, as other shells do.
+                    error = replace_shell_process(full_path, [cmd] + filtered_args, stdout_file, stderr_file, modes)
+                    stdout, stderr = "", f"{cmd}: {error}\n" if error else ""
+                    stdout_file = stderr_file = None
+                elif full_path:
+                    # The child writes to the terminal or the redirection targets itself.
+                    error = run_external_command(cmd, filtered_args, full_path, stdout_file, stderr_file, modes)
+                    stdout, stderr = "", error
+                    stdout_file = stderr_file = None
                 else:
                     stdout, stderr = "", f"{cmd}: command not found\n"
+            elif cmd == "cat":
+                # Streamed straight to stdout or the redirection target.
+                stdout, stderr = "", stream_cat_command(filtered_args, stdout_file, modes['stdout'])
+                stdout_file = None
+            elif cmd == "exec":
+                # Only returns if the command could not be executed.
+                stdout, stderr = handle_exec_command(filtered_args, stdout_file, stderr_file, modes)
+                stdout_file = stderr_file = None
+            else:
+                stdout, stderr = handler(filtered_args)
 
             if stdout_file:
                 write_output_to_file(stdout_file, stdout, modes['stdout'])
             elif stdout:
-                print(stdout, end='')
+                write_to_stream(sys.stdout, stdout)
 
             if stderr_file:
                 write_output_to_file(stderr_file, stderr, modes['stderr'])
             elif stderr:
-                print(stderr, end='', file=sys.stderr)
+                write_to_stream(sys.stderr, stderr)
 
         except KeyboardInterrupt:
             print()